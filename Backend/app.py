@@ -1,46 +1,258 @@
-from flask_cors import CORS
-from flask import Flask, request, jsonify
-import joblib
+from quart_cors import cors
+from quart import Quart, request, jsonify
+from quart.json.provider import DefaultJSONProvider
+import orjson
 import numpy as np
-import requests
+import httpx
+from cachetools import TTLCache
+import asyncio
 import datetime
+import functools
 import traceback
 import os
+from urllib.parse import quote
 from dotenv import load_dotenv
 
+try:
+    import tl2cgen  # runtime for the optional Treelite-compiled model
+except ImportError:
+    tl2cgen = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialises responses with orjson (NumPy scalars/arrays natively); request parsing is unchanged."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
 
-app = Flask(__name__)
-CORS(app)
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+app = cors(app, allow_origin="*")
+
+def load_onnx_session(path):
+    """Build a single-threaded ONNX Runtime session, or None if onnxruntime is unavailable."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("onnxruntime not installed; falling back to the pickled sklearn model.")
+        return None
+    sess_options = ort.SessionOptions()
+    # one row per request: a thread pool only adds dispatch overhead
+    sess_options.intra_op_num_threads = 1
+    # the session may be created before gunicorn forks its workers (preload_app)
+    sess_options.enable_mem_pattern = False
+    return ort.InferenceSession(path, sess_options, providers=["CPUExecutionProvider"])
+
+def load_treelite_predictor(path):
+    """Load a Treelite-compiled forest, or None if tl2cgen is unavailable."""
+    if tl2cgen is None:
+        print("tl2cgen not installed; skipping compiled predictor.")
+        return None
+    return tl2cgen.Predictor(path, nthread=1)
+
+TREELITE_LIB = "crop_model.dll" if os.name == "nt" else "crop_model.so"
+
+def load_preprocessing():
+    """Return (scale, offset, class names) from preprocess.npz, else from the legacy pickles."""
+    if os.path.exists("preprocess.npz"):
+        # plain arrays: no pickle / sklearn import needed
+        with np.load("preprocess.npz", allow_pickle=False) as params:
+            return params["scale"], params["offset"], params["classes"]
+    if os.path.exists("scaler.pkl") and os.path.exists("encoder.pkl"):
+        import joblib
+        scaler = joblib.load("scaler.pkl")
+        encoder = joblib.load("encoder.pkl")
+        # MinMaxScaler.transform is just X * scale_ + min_
+        return scaler.scale_.astype(np.float32), scaler.min_.astype(np.float32), encoder.classes_
+    return None, None, None
+
+def load_model_backend(skip=()):
+    """Return (predictor, session, model) with only the first loadable backend set.
+
+    Backends named in skip ("treelite", "onnx", "pickle") are not tried.
+    """
+    if "treelite" not in skip and os.path.exists(TREELITE_LIB):
+        predictor = load_treelite_predictor(TREELITE_LIB)
+        if predictor is not None:
+            return predictor, None, None
+    if "onnx" not in skip and os.path.exists("crop_model.onnx"):
+        session = load_onnx_session("crop_model.onnx")
+        if session is not None:
+            return None, session, None
+    if "pickle" not in skip and os.path.exists("crop_model.pkl"):
+        import joblib
+        model = joblib.load("crop_model.pkl")
+        # single-row predicts: skip joblib backend setup on every call
+        model.n_jobs = 1
+        return None, None, model
+    return None, None, None
 
 # Try to load model and preprocessing tools, but don't crash if missing.
+# Preference: compiled Treelite library, then the ONNX export, then crop_model.pkl.
+# SCALE/OFFSET apply the MinMaxScaler as a float32 affine op and LABELS maps
+# predicted class indices to crop names, so the prediction path skips sklearn entirely.
+predictor = None
+session = None
 model = None
-scaler = None
-encoder = None
+SCALE = None
+OFFSET = None
+LABELS = None
 try:
-    if os.path.exists("crop_model.pkl") and os.path.exists("scaler.pkl") and os.path.exists("encoder.pkl"):
-        model = joblib.load("crop_model.pkl")
-        scaler = joblib.load("scaler.pkl")
-        encoder = joblib.load("encoder.pkl")
-    else:
-        print("Model artifacts not found (crop_model.pkl / scaler.pkl / encoder.pkl). Falling back to heuristics.")
+    SCALE, OFFSET, classes = load_preprocessing()
+    if classes is not None:
+        # plain, already title-cased Python strings: decoding is a tuple index
+        LABELS = tuple(str(label).title() for label in classes)
+        predictor, session, model = load_model_backend()
+    if predictor is None and session is None and model is None:
+        print("Model artifacts not found (crop_model.so / crop_model.onnx / crop_model.pkl + preprocess.npz). Falling back to heuristics.")
 except Exception:
     print("Failed to load model artifacts:")
     traceback.print_exc()
+    predictor = session = model = None
+
+def predict_encoded(scaled_input):
+    """Return encoded crop labels for an already scaled feature matrix.
+
+    The Treelite library is the exception: it takes raw (unscaled) features.
+    """
+    if predictor is not None:
+        # convert up front: DMatrix can't cast without a copy under NumPy 2
+        dtype = predictor.threshold_type
+        dmat = tl2cgen.DMatrix(np.asarray(scaled_input, dtype=dtype), dtype=dtype)
+        # class probabilities, shape (rows, 1, n_classes) for a forest classifier
+        proba = predictor.predict(dmat)
+        return np.argmax(proba.reshape(len(scaled_input), -1), axis=1)
+    if session is not None:
+        return session.run(None, {"input": scaled_input.astype(np.float32, copy=False)})[0]
+    return model.predict(scaled_input)
+
+# Micro-batching: concurrent requests are coalesced into one predict call so the
+# per-call dispatch overhead is paid once per batch instead of once per row.
+BATCH_MAX_SIZE = 64
+BATCH_MAX_WAIT = 0.005  # upper bound (seconds) on collecting more rows after the first one
+
+predict_queue = None
+batcher_task = None
+batch_buf = np.empty((BATCH_MAX_SIZE, 7), dtype=np.float32)
+
+async def predict_batcher():
+    """Drain (row, future) pairs from predict_queue and resolve them batch by batch."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await predict_queue.get()]
+        deadline = loop.time() + BATCH_MAX_WAIT
+        # take rows that are already queued and keep going only while more are
+        # still arriving; a lone request is predicted straight away
+        while len(batch) < BATCH_MAX_SIZE and loop.time() < deadline:
+            if predict_queue.empty():
+                await asyncio.sleep(0)  # let handlers that are already running enqueue
+                if predict_queue.empty():
+                    break
+            while len(batch) < BATCH_MAX_SIZE and not predict_queue.empty():
+                batch.append(predict_queue.get_nowait())
+
+        try:
+            # the batcher is the only writer, so one preallocated buffer is enough
+            X = batch_buf[:len(batch)]
+            for i, (row, _) in enumerate(batch):
+                X[i] = row
+            # the Treelite library has the scaler folded into its thresholds
+            if predictor is None:
+                X *= SCALE
+                X += OFFSET
+            labels = [LABELS[int(i)] for i in predict_encoded(X)]
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for (_, future), label in zip(batch, labels):
+            # the requesting handler may have been cancelled meanwhile
+            if not future.done():
+                future.set_result(label)
+
+async def predict_label(row):
+    """Queue one unscaled feature row (a 7-tuple) and wait for its decoded crop label."""
+    future = asyncio.get_running_loop().create_future()
+    await predict_queue.put((row, future))
+    return await future
+
+# Async client shared by all requests; reuses TCP/TLS connections to OpenWeatherMap.
+# Created per serving process in before_serving so it binds to the running loop.
+http = None
+
+# Resolve the OpenWeatherMap key once at import (.env is honoured) instead of per request
+load_dotenv()
+_API_KEY = os.getenv("OPENWEATHER_API_KEY") or ""  # Set to your own OpenWeatherMap API key
+_WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather?units=metric&appid=" + _API_KEY + "&q={}"
+
+# Weather changes on minute scales: cache successful lookups per city for 5 minutes
+weather_cache = TTLCache(maxsize=1024, ttl=300)
+
+@app.before_serving
+async def startup():
+    global http, predict_queue, batcher_task, predictor, session, model
+    http = httpx.AsyncClient(
+        timeout=2.0,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+    )
+    # warm the model so the first request doesn't pay one-off init costs; a backend
+    # that can't predict is dropped for the next artifact in the preference chain
+    failed = set()
+    while predictor is not None or session is not None or model is not None:
+        try:
+            predict_encoded(np.zeros((1, 7), dtype=np.float32))
+            break
+        except Exception:
+            backend = "treelite" if predictor is not None else "onnx" if session is not None else "pickle"
+            print(f"Warm-up prediction failed for the {backend} backend; trying the next one:")
+            traceback.print_exc()
+            failed.add(backend)
+            try:
+                predictor, session, model = load_model_backend(skip=failed)
+            except Exception:
+                traceback.print_exc()
+                predictor = session = model = None
+    if predictor is None and session is None and model is None and failed:
+        print("No working model backend. Falling back to heuristics.")
+    predict_queue = asyncio.Queue()
+    batcher_task = asyncio.create_task(predict_batcher())
+
+@app.after_serving
+async def shutdown():
+    batcher_task.cancel()
+    await http.aclose()
 
 # 🌦️ Fetch live weather + location data dynamically
-def get_weather(city):
-    API_KEY = os.getenv("OPENWEATHER_API_KEY")  # Replace with your own OpenWeatherMap API key
-    url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&units=metric&appid={API_KEY}"
+async def get_weather(city):
+    key = city.lower().strip()
+    cached = weather_cache.get(key)
+    if cached is not None:
+        return cached
 
-    response = requests.get(url)
-    data = response.json()
+    weather = await fetch_weather(key)
+    # failures are not cached so the next request retries the API
+    if weather is not None:
+        weather_cache[key] = weather
+    return weather
+
+async def fetch_weather(city):
+    try:
+        response = await http.get(_WEATHER_URL.format(quote(city)))
+        data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        print("Weather API Error:", e)
+        return None
 
     if response.status_code == 200 and "main" in data:
-        temperature = data["main"]["temp"]
-        humidity = data["main"]["humidity"]
-        rainfall = data.get("rain", {}).get("1h", 0)
-        lat = data["coord"]["lat"]
-        lon = data["coord"]["lon"]
+        # cast once here: the API may send ints, and these values end up in the response JSON
+        temperature = float(data["main"]["temp"])
+        humidity = float(data["main"]["humidity"])
+        rainfall = float(data.get("rain", {}).get("1h", 0))
+        lat = float(data["coord"]["lat"])
+        lon = float(data["coord"]["lon"])
         return temperature, humidity, rainfall, lat, lon
     else:
         print("Weather API Error:", data)
@@ -65,11 +277,25 @@ def get_season(temp):
     else:
         return "Winter"
 
+# Very small heuristic fallback - choose crop by pH and NPK rough ranges
+def heuristic_crop(N, P, ph):
+    if ph < 6.0 and N > 80:
+        return "rice"
+    elif 6.0 <= ph <= 7.5 and P > 40:
+        return "maize"
+    else:
+        return "wheat"
+
+# Title-casing is Unicode-aware and not free; cities and crop names repeat a lot
+@functools.lru_cache(maxsize=1024)
+def _title(text):
+    return text.title()
+
 # 🌾 Enhanced prediction route
 @app.route("/predict", methods=["POST"])
-def predict_crop():
+async def predict_crop():
     try:
-        data = request.get_json(force=True)
+        data = await request.get_json(force=True)
 
         # accept multiple possible field names from frontend/backends
         city = data.get("city") or data.get("City") or ""
@@ -101,7 +327,7 @@ def predict_crop():
             return jsonify({"error": "Missing required field: city"}), 400
 
         # 🌦️ Live weather fetch (best-effort)
-        weather_data = get_weather(city)
+        weather_data = await get_weather(city)
         if not weather_data:
             # fallback synthetic weather if external API fails
             temperature, humidity, rainfall, lat, lon = 25.0, 60.0, 50.0, 20.0, 78.0
@@ -113,42 +339,39 @@ def predict_crop():
             season = get_season(temperature)
 
         # If model artifacts are available, use them. Otherwise use a simple rule-based fallback.
-        if model is not None and scaler is not None and encoder is not None:
-            input_data = np.array([[N, P, K, temperature, humidity, ph, rainfall]])
+        # Clients can also ask for the heuristic directly ("fast": true) to skip the model.
+        fast = data.get("fast") in (True, "1", "true")
+        if fast or (predictor is None and session is None and model is None):
+            crop_name = heuristic_crop(N, P, ph)
+        else:
             try:
-                scaled_input = scaler.transform(input_data)
-                prediction = model.predict(scaled_input)
-                crop_name = encoder.inverse_transform(prediction)[0]
+                # copied into the batcher's float32 buffer; no per-request ndarray
+                crop_name = await predict_label((N, P, K, temperature, humidity, ph, rainfall))
             except Exception:
                 traceback.print_exc()
                 crop_name = "wheat"
-        else:
-            # Very small heuristic fallback - choose crop by pH and NPK rough ranges
-            if ph < 6.0 and N > 80:
-                crop_name = "rice"
-            elif 6.0 <= ph <= 7.5 and P > 40:
-                crop_name = "maize"
-            else:
-                crop_name = "wheat"
 
-        # human-friendly note
-        note = (
-            f"Based on current {season.lower()} conditions in {city.title()}, with temperature {temperature}°C and humidity {humidity}%, "
-            f"the recommended crop is {str(crop_name).title()}."
-        )
+        city_title = _title(city)
+        crop_title = _title(crop_name)
+        details = {
+            "season": season,
+            "region": region,
+        }
+        # human-friendly note, only built when the client asks for it (?verbose=1)
+        if request.args.get("verbose", "").lower() in ("1", "true"):
+            details["reason"] = (
+                f"Based on current {season.lower()} conditions in {city_title}, with temperature {temperature}°C and humidity {humidity}%, "
+                f"the recommended crop is {crop_title}."
+            )
 
         # Return the compact JSON shape the frontend expects
         return jsonify({
-            "city": city.title(),
+            "city": city_title,
             "temperature": temperature,
             "humidity": humidity,
             "rainfall": rainfall,
-            "recommended_crop": str(crop_name).title(),
-            "details": {
-                "season": season,
-                "reason": note,
-                "region": region,
-            },
+            "recommended_crop": crop_title,
+            "details": details,
         })
 
     except Exception:
@@ -0,0 +1,17 @@
+# Production settings, picked up automatically by `gunicorn app:app` run from Backend/.
+import gc
+
+bind = "127.0.0.1:5000"
+workers = 4
+# Quart is an ASGI app, so run it on uvicorn workers
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import app.py (and load the model) once in the master; forked workers then
+# share those pages copy-on-write instead of each holding its own copy.
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the GC's reach so collections in the
+    # workers don't write to (and thereby copy) the shared model pages.
+    gc.freeze()
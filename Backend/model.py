@@ -1,13 +1,15 @@
+import os
+import copy
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import warnings
 from sklearn.preprocessing import MinMaxScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import accuracy_score
 from sklearn.ensemble import RandomForestClassifier
 import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
 
 warnings.filterwarnings("ignore")
 
@@ -29,30 +31,6 @@ unique_crops = data['label'].unique()
 print(f"\n🌾 Unique Crops: {len(unique_crops)}")
 print("Crops List:", unique_crops)
 
-# --- Visualizations ---
-plt.figure(figsize=(10, 6))
-sns.countplot(
-    y="label",
-    data=data,
-    order=data["label"].value_counts().index,
-    hue="label",
-    palette="viridis",
-    legend=False
-)
-plt.title("Crop Distribution in Dataset")
-plt.xlabel("Count")
-plt.ylabel("Crop Type")
-plt.tight_layout()
-plt.show()
-
-# --- Heatmap (Only Numeric Columns) ---
-plt.figure(figsize=(10, 7))
-numeric_data = data.select_dtypes(include=["float64", "int64"])
-sns.heatmap(numeric_data.corr(), annot=True, cmap="YlGnBu", fmt=".2f")
-plt.title("Feature Correlation Heatmap (Numeric Features Only)")
-plt.tight_layout()
-plt.show()
-
 # --- Feature and Label separation ---
 X = data[["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]]
 Y = data["label"]
@@ -69,9 +47,39 @@ X_train, X_test, Y_train, Y_test = train_test_split(
     X_scaled, Y_encoded, test_size=0.2, random_state=2
 )
 
+# --- Model size selection ---
+# Predict cost grows with the number of trees, so pick the smallest forest whose
+# 5-fold CV accuracy is within 0.2 points of the best, preferring stronger
+# cost-complexity pruning (ccp_alpha) among equally small forests.
+grid = GridSearchCV(
+    RandomForestClassifier(criterion="entropy", random_state=2, max_depth=5, n_jobs=1),
+    param_grid={"n_estimators": [20, 30, 50, 100], "ccp_alpha": [0.0, 0.001, 0.005]},
+    cv=5,
+    scoring="accuracy",
+)
+grid.fit(X_train, Y_train)
+
+results = pd.DataFrame(grid.cv_results_)
+best_score = results["mean_test_score"].max()
+candidates = results[results["mean_test_score"] >= best_score - 0.002]
+chosen = candidates.sort_values(
+    ["param_n_estimators", "param_ccp_alpha"], ascending=[True, False]
+).iloc[0]
+n_estimators = int(chosen["param_n_estimators"])
+ccp_alpha = float(chosen["param_ccp_alpha"])
+print(
+    f"\n🌲 Selected n_estimators={n_estimators}, ccp_alpha={ccp_alpha} "
+    f"(CV {chosen['mean_test_score'] * 100:.2f}% vs best {best_score * 100:.2f}%)"
+)
+
 # --- Model training ---
 rf = RandomForestClassifier(
-    n_estimators=100, criterion="entropy", random_state=2, max_depth=5
+    n_estimators=n_estimators,
+    criterion="entropy",
+    random_state=2,
+    max_depth=5,
+    ccp_alpha=ccp_alpha,
+    n_jobs=1,
 )
 rf.fit(X_train, Y_train)
 
@@ -85,15 +93,60 @@ joblib.dump(rf, "crop_model.pkl")
 joblib.dump(scaler, "scaler.pkl")
 joblib.dump(encoder, "encoder.pkl")
 
-print("\n💾 Model, Scaler, and Encoder saved successfully!")
-
-# --- Feature Importance Plot ---
-plt.figure(figsize=(8, 6))
-importance = rf.feature_importances_
-features = X.columns
-sns.barplot(x=importance, y=features, palette="Greens_r")
-plt.title("Feature Importance in Crop Prediction")
-plt.xlabel("Importance Score")
-plt.ylabel("Feature")
-plt.tight_layout()
-plt.show()
+# Pickle-free preprocessing for app.py: MinMaxScaler as X * scale + offset, plus class names
+np.savez(
+    "preprocess.npz",
+    scale=scaler.scale_.astype(np.float32),
+    offset=scaler.min_.astype(np.float32),
+    classes=encoder.classes_.astype(str),
+)
+
+# ONNX export for fast single-row inference in app.py (labels only, no zipmap)
+onnx_model = convert_sklearn(
+    rf,
+    initial_types=[("input", FloatTensorType([None, 7]))],
+    options={id(rf): {"zipmap": False}},
+)
+with open("crop_model.onnx", "wb") as f:
+    f.write(onnx_model.SerializeToString())
+
+# Optional: compile the forest to a native predictor with Treelite/TL2cgen.
+# Needs a C toolchain, so skip quietly when the packages aren't installed.
+# The MinMaxScaler is monotonic per feature, so it can be folded into the split
+# thresholds: the compiled library then takes raw features and app.py skips scaling.
+# "quantize" bins those thresholds into small integer indices in the generated code.
+def fold_scaler_into_forest(forest, scaler):
+    folded = copy.deepcopy(forest)
+    for estimator in folded.estimators_:
+        tree = estimator.tree_
+        split = tree.feature >= 0  # leaves have feature == -2
+        features = tree.feature[split]
+        tree.threshold[split] = (tree.threshold[split] - scaler.min_[features]) / scaler.scale_[features]
+    return folded
+
+TREELITE_LIB = "crop_model.dll" if os.name == "nt" else "crop_model.so"
+
+try:
+    import treelite
+    import tl2cgen
+
+    tl_model = treelite.sklearn.import_model(fold_scaler_into_forest(rf, scaler))
+    tl2cgen.export_lib(
+        tl_model,
+        toolchain="msvc" if os.name == "nt" else "gcc",
+        libpath=TREELITE_LIB,
+        params={"parallel_comp": 32, "quantize": 1},
+        verbose=False,
+    )
+    print("⚙️ Compiled native predictor with Treelite.")
+except Exception as e:
+    if isinstance(e, ImportError):
+        print("treelite / tl2cgen not installed; skipping native predictor export.")
+    else:
+        print("Treelite compilation failed; skipping native predictor export:", e)
+    # app.py prefers the native library, so don't leave a library from an older model behind
+    if os.path.exists(TREELITE_LIB):
+        os.remove(TREELITE_LIB)
+        print(f"Removed stale {TREELITE_LIB}.")
+
+print("\n💾 Model (pkl + onnx), Scaler, Encoder and preprocess.npz saved successfully!")
@@ -0,0 +1,65 @@
+import sys
+import warnings
+import pandas as pd
+import joblib
+
+warnings.filterwarnings("ignore")
+
+# Exploratory plots for the crop dataset and the trained model.
+# Kept out of model.py so retraining on a headless server doesn't import matplotlib/seaborn.
+#   python model_eda.py             -> show the plots
+#   python model_eda.py --headless  -> save them as PNGs (Agg backend, for CI)
+HEADLESS = "--headless" in sys.argv
+
+
+def finish(plt, filename):
+    plt.tight_layout()
+    if HEADLESS:
+        plt.savefig(filename)
+        plt.close()
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    import matplotlib
+
+    if HEADLESS:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    data = pd.read_csv("Crop_recommendation.csv")
+
+    # --- Crop Count ---
+    plt.figure(figsize=(10, 6))
+    sns.countplot(
+        y="label",
+        data=data,
+        order=data["label"].value_counts().index,
+        hue="label",
+        palette="viridis",
+        legend=False
+    )
+    plt.title("Crop Distribution in Dataset")
+    plt.xlabel("Count")
+    plt.ylabel("Crop Type")
+    finish(plt, "crop_distribution.png")
+
+    # --- Heatmap (Only Numeric Columns) ---
+    plt.figure(figsize=(10, 7))
+    numeric_data = data.select_dtypes(include=["float64", "int64"])
+    sns.heatmap(numeric_data.corr(), annot=True, cmap="YlGnBu", fmt=".2f")
+    plt.title("Feature Correlation Heatmap (Numeric Features Only)")
+    finish(plt, "feature_correlation.png")
+
+    # --- Feature Importance Plot (needs crop_model.pkl from model.py) ---
+    rf = joblib.load("crop_model.pkl")
+    plt.figure(figsize=(8, 6))
+    importance = rf.feature_importances_
+    features = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+    sns.barplot(x=importance, y=features, palette="Greens_r")
+    plt.title("Feature Importance in Crop Prediction")
+    plt.xlabel("Importance Score")
+    plt.ylabel("Feature")
+    finish(plt, "feature_importance.png")
@@ -51,7 +51,7 @@ const getCropRecommendation = async (formData: FormData) => {
     ph: parseFloat(formData.ph),
   };
 
-  const res = await fetch(`${API_BASE_URL}/predict`, {
+  const res = await fetch(`${API_BASE_URL}/predict?verbose=1`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",